@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+GitHub Trending Tool 导出与分析性能基准
+生成大规模历史记录，使用 tracemalloc 统计分块导出和趋势分析的峰值内存
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from github_trending import GitHubTrending
+from trending_analytics import TrendingAnalytics
+
+LANGUAGES = ["Python", "JavaScript", "Go", "Rust", "TypeScript", "Java", "C++", "Shell"]
+
+
+def generate_history(filename: str, rows: int, per_snapshot: int = 25) -> None:
+    """生成模拟的历史记录文件"""
+    start = datetime(2026, 1, 1)
+    with open(filename, 'w', encoding='utf-8') as f:
+        for i in range(rows):
+            snapshot = start + timedelta(hours=i // per_snapshot)
+            record = {
+                'rank': i % per_snapshot + 1,
+                'name': f"owner{i % 5000}/repo{i % 5000}",
+                'url': f"https://github.com/owner{i % 5000}/repo{i % 5000}",
+                'description': f"Synthetic project number {i % 5000} used for export benchmarks",
+                'language': LANGUAGES[i % len(LANGUAGES)],
+                'stars': 1000 + i % 100000,
+                'stars_today': i % 500,
+                'forks': i % 3000,
+                'timestamp': snapshot.isoformat(),
+                'snapshot': snapshot.isoformat(),
+                'language_filter': '',
+                'since': 'daily'
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def measure(label: str, func) -> float:
+    """运行函数并返回峰值内存（MB）"""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    func()
+    duration = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peak_mb = peak / 1024 / 1024
+    print(f"{label:<12} 峰值内存: {peak_mb:8.1f} MB | 用时: {duration:6.2f}秒")
+    return peak_mb
+
+
+def analyze(trending: GitHubTrending) -> None:
+    """逐块计算趋势指标，不保留结果"""
+    analytics = TrendingAnalytics(window="24h")
+    for _ in analytics.from_history(trending):
+        pass
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='历史记录导出与分析内存基准')
+    parser.add_argument('--rows', type=int, default=1000000,
+                       help='历史记录行数 (默认: 1000000)')
+    parser.add_argument('--memory-limit', type=int, default=64,
+                       help='分块内存上限，单位MB (默认: 64)')
+    parser.add_argument('--baseline', action='store_true',
+                       help='同时测量一次性加载到DataFrame的峰值内存（内存占用很高）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        trending = GitHubTrending(memory_limit_mb=args.memory_limit)
+        trending.history_file = os.path.join(tmpdir, 'history.jsonl')
+
+        print(f"生成 {args.rows:,} 行历史记录...")
+        generate_history(trending.history_file, args.rows)
+
+        csv_file = os.path.join(tmpdir, 'history.csv')
+        json_file = os.path.join(tmpdir, 'history.json')
+
+        csv_peak = measure("分块CSV", lambda: trending.export_to_csv(trending.iter_history(), csv_file))
+        json_peak = measure("流式JSON", lambda: trending.export_to_json(trending.iter_history(), json_file))
+        analysis_peak = measure("趋势分析", lambda: analyze(trending))
+
+        if args.baseline:
+            measure("全量CSV", lambda: pd.DataFrame(list(trending.iter_history())).to_csv(
+                csv_file, index=False, encoding='utf-8-sig'))
+
+    peak = max(csv_peak, json_peak, analysis_peak)
+    if peak > args.memory_limit:
+        print(f"❌ 峰值内存 {peak:.1f} MB 超过上限 {args.memory_limit} MB")
+        return 1
+
+    print(f"✓ 峰值内存未超过上限 {args.memory_limit} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
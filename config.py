@@ -5,6 +5,13 @@ GitHub Trending Tool 配置文件
 # 缓存配置
 CACHE_TIMEOUT = 3600  # 缓存超时时间（秒），默认1小时
 CACHE_FILE = ".github_trending_cache.json"
+PARSE_CACHE_FILE = ".github_trending_parse_cache.json"
+PARSE_CACHE_SIZE = 128  # 解析结果缓存条目数（按页面内容哈希），0表示禁用
+
+# 历史记录配置
+HISTORY_FILE = ".github_trending_history.jsonl"
+EXPORT_CHUNK_SIZE = 50000  # 导出时每个分块的最大行数
+MEMORY_LIMIT_MB = 256  # 导出时单个分块的内存上限（MB）
 
 # 请求配置
 REQUEST_TIMEOUT = 10  # 请求超时时间（秒）
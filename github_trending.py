@@ -5,29 +5,58 @@ GitHub Trending Projects Tool
 """
 
 import argparse
+import copy
+import hashlib
 import json
+import os
+import re
 import sys
 import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 
 
+# 匹配项目列表中的每个 <article class="Box-row"> 区块
+ARTICLE_PATTERN = re.compile(r'<article\b[^>]*\bBox-row\b.*?</article>', re.S | re.I)
+WHITESPACE_PATTERN = re.compile(r'>\s+<')
+
+# 分块导出时按类别类型存储的低基数列
+CATEGORICAL_COLUMNS = ['language', 'language_filter', 'since']
+
+
 class GitHubTrending:
     """GitHub趋势项目获取器"""
     
-    def __init__(self, cache_timeout: int = 3600):
+    def __init__(self, cache_timeout: int = 3600, parse_cache_size: int = 128,
+                 chunk_size: int = 50000, memory_limit_mb: int = 256):
         """
         初始化GitHub趋势获取器
         
         Args:
             cache_timeout: 缓存超时时间（秒），默认1小时
+            parse_cache_size: 解析结果缓存的最大条目数，0表示禁用
+            chunk_size: 导出时每个分块的最大行数
+            memory_limit_mb: 导出时单个分块的内存上限（MB）
         """
         self.base_url = "https://github.com/trending"
         self.cache_timeout = cache_timeout
         self.cache_file = ".github_trending_cache.json"
+        self.history_file = ".github_trending_history.jsonl"
+        self.chunk_size = chunk_size
+        self.memory_limit_mb = memory_limit_mb
+        self.parse_cache_size = parse_cache_size
+        self.parse_cache_file = ".github_trending_parse_cache.json"
+        self._parse_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._parse_cache_loaded = False
+        # 最近一次 fetch_trending 的结果是否来自文件缓存
+        self.last_from_cache = False
+        self.parse_cache_hits = 0
+        self.parse_cache_misses = 0
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
@@ -73,10 +102,13 @@ class GitHubTrending:
         Returns:
             项目列表
         """
+        self.last_from_cache = False
+        
         # 检查缓存
         if use_cache:
             cached_data = self._load_cache()
             if cached_data:
+                self.last_from_cache = True
                 return cached_data
         
         # 构建URL
@@ -92,9 +124,8 @@ class GitHubTrending:
             response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             
-            # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            projects = self._parse_projects(soup)
+            # 解析HTML（内容未变化时直接复用解析结果）
+            projects = self._parse_html(response.text)
             
             # 保存缓存
             self._save_cache(projects)
@@ -106,9 +137,90 @@ class GitHubTrending:
             # 尝试使用缓存
             cached_data = self._load_cache()
             if cached_data:
+                self.last_from_cache = True
                 return cached_data
             return []
     
+    def _content_hash(self, html: str) -> str:
+        """计算项目列表区块的内容哈希（忽略页面其余部分和标签间空白差异）"""
+        articles = ARTICLE_PATTERN.findall(html)
+        content = '\n'.join(articles) if articles else html
+        content = WHITESPACE_PATTERN.sub('><', content)
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _load_parse_cache(self) -> None:
+        """从文件加载解析结果缓存，使多次运行之间可以复用"""
+        self._parse_cache_loaded = True
+        try:
+            with open(self.parse_cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('entries', [])
+            for key, projects in entries[-self.parse_cache_size:]:
+                self._parse_cache[key] = projects
+        except (FileNotFoundError, json.JSONDecodeError, ValueError, TypeError):
+            pass
+    
+    def _save_parse_cache(self) -> None:
+        """
+        保存解析结果缓存（按最近使用顺序）
+        
+        先写入临时文件再替换，并发运行时不会留下被截断的缓存文件。
+        """
+        tmp_file = f"{self.parse_cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'entries': list(self._parse_cache.items())}, f, ensure_ascii=False)
+            os.replace(tmp_file, self.parse_cache_file)
+        except Exception as e:
+            print(f"警告: 解析缓存保存失败: {e}")
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+    
+    def _parse_html(self, html: str) -> List[Dict[str, Any]]:
+        """
+        解析页面HTML，相同内容命中缓存时跳过BeautifulSoup解析
+        
+        缓存保存在 parse_cache_file 中，每次运行创建新实例时也能命中；
+        只有未命中时才会写文件，命中路径不产生磁盘写入。
+        """
+        if self.parse_cache_size <= 0:
+            return self._parse_projects(BeautifulSoup(html, 'html.parser'))
+        
+        if not self._parse_cache_loaded:
+            self._load_parse_cache()
+        
+        key = self._content_hash(html)
+        cached = self._parse_cache.get(key)
+        if cached is not None:
+            self.parse_cache_hits += 1
+            self._parse_cache.move_to_end(key)
+            # 返回副本并刷新时间戳，避免调用方修改缓存内容
+            timestamp = datetime.now().isoformat()
+            projects = copy.deepcopy(cached)
+            for project in projects:
+                project['timestamp'] = timestamp
+            # 命中时不写文件，缓存只在新增条目（及淘汰）时保存
+            return projects
+        
+        self.parse_cache_misses += 1
+        projects = self._parse_projects(BeautifulSoup(html, 'html.parser'))
+        self._parse_cache[key] = copy.deepcopy(projects)
+        while len(self._parse_cache) > self.parse_cache_size:
+            self._parse_cache.popitem(last=False)
+        self._save_parse_cache()
+        return projects
+    
+    def parse_cache_stats(self) -> Dict[str, Any]:
+        """获取解析缓存的命中统计"""
+        total = self.parse_cache_hits + self.parse_cache_misses
+        return {
+            'hits': self.parse_cache_hits,
+            'misses': self.parse_cache_misses,
+            'hit_rate': self.parse_cache_hits / total if total else 0.0,
+            'size': len(self._parse_cache)
+        }
+    
     def _parse_projects(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
         """解析HTML获取项目信息"""
         projects = []
@@ -226,24 +338,137 @@ class GitHubTrending:
             top_project = max(projects, key=lambda x: x['stars_today'])
             print(f"    • 今日最火: {top_project['name']} (+{top_project['stars_today']:,}⭐)")
             
-    def export_to_csv(self, projects: List[Dict[str, Any]], filename: str = "github_trending.csv") -> None:
-        """导出到CSV文件"""
+    def save_history(self, projects: List[Dict[str, Any]], language: str = "", since: str = "daily") -> None:
+        """
+        追加一次快照到历史文件（JSON Lines，每行一个项目）
+        
+        快照时间取自项目的解析时间戳，而不是保存时间；
+        projects 应为新获取的数据，不应来自文件缓存（见 last_from_cache）。
+        """
         if not projects:
+            return
+        
+        snapshot = projects[0].get('timestamp') or datetime.now().isoformat()
+        try:
+            with open(self.history_file, 'a', encoding='utf-8') as f:
+                for project in projects:
+                    record = dict(project, snapshot=snapshot, language_filter=language, since=since)
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except Exception as e:
+            print(f"警告: 历史记录保存失败: {e}")
+    
+    def iter_history(self) -> Iterator[Dict[str, Any]]:
+        """逐行读取历史快照，不会一次性加载整个文件"""
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            return
+    
+    def history_columns(self) -> List[str]:
+        """扫描历史记录，按首次出现的顺序返回所有字段名"""
+        return self._collect_columns(self.iter_history())
+    
+    def _collect_columns(self, projects: Iterable[Dict[str, Any]]) -> List[str]:
+        """合并所有记录的字段名，保持首次出现的顺序"""
+        columns: Dict[str, None] = {}
+        for project in projects:
+            columns.update(dict.fromkeys(project))
+        return list(columns)
+    
+    def iter_frames(self, projects: Iterable[Dict[str, Any]]) -> Iterator[pd.DataFrame]:
+        """
+        将项目记录按块转换为DataFrame
+        
+        低基数列使用类别类型；根据已生成分块的实际内存占用调整分块大小，
+        使单个分块保持在 memory_limit_mb 以内。
+        """
+        records = iter(projects)
+        max_chunk_size = max(1, self.chunk_size)
+        limit_bytes = self.memory_limit_mb * 1024 * 1024
+        # 先用小分块估算每行内存，再据此确定后续分块大小
+        chunk_size = min(max_chunk_size, 1000)
+        
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return
+            
+            df = pd.DataFrame.from_records(chunk)
+            del chunk
+            for column in CATEGORICAL_COLUMNS:
+                if column in df.columns:
+                    df[column] = df[column].astype('category')
+            
+            # 原始字典列表与写出缓冲的开销约为DataFrame的数倍，按8倍预留
+            row_bytes = df.memory_usage(deep=True).sum() / len(df)
+            chunk_size = max(1, min(max_chunk_size, int(limit_bytes / (row_bytes * 8))))
+            yield df
+    
+    def export_to_csv(self, projects: Iterable[Dict[str, Any]], filename: str = "github_trending.csv",
+                      columns: Optional[List[str]] = None) -> None:
+        """
+        导出到CSV文件（分块写入，支持迭代器输入）
+        
+        Args:
+            projects: 项目记录，可以是列表或迭代器
+            filename: 输出文件名
+            columns: CSV字段；未指定时列表输入会合并所有记录的字段，
+                迭代器输入使用第一个分块的字段，之后出现新字段时报错而不是丢弃数据
+        """
+        if columns is None and iter(projects) is not projects:
+            columns = self._collect_columns(projects)
+        
+        records = iter(projects)
+        first = next(records, None)
+        if first is None:
             print("没有数据可导出")
             return
         
-        df = pd.DataFrame(projects)
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
+        # 写入临时文件，全部成功后再替换，出错时不会留下不完整的CSV
+        header = True
+        tmp_file = f"{filename}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8-sig', newline='') as f:
+                for df in self.iter_frames(chain([first], records)):
+                    if columns is None:
+                        columns = list(df.columns)
+                    unknown = [column for column in df.columns if column not in columns]
+                    if unknown:
+                        raise ValueError(f"记录中包含未知字段: {', '.join(unknown)}")
+                    df.reindex(columns=columns).to_csv(f, index=False, header=header)
+                    header = False
+            os.replace(tmp_file, filename)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
         print(f"数据已导出到: {filename}")
     
-    def export_to_json(self, projects: List[Dict[str, Any]], filename: str = "github_trending.json") -> None:
-        """导出到JSON文件"""
-        if not projects:
+    def export_to_json(self, projects: Iterable[Dict[str, Any]], filename: str = "github_trending.json") -> None:
+        """导出到JSON文件（逐条写入，支持迭代器输入）"""
+        records = iter(projects)
+        first = next(records, None)
+        if first is None:
             print("没有数据可导出")
             return
         
+        # 输出格式与 json.dump(projects, f, indent=2) 一致
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(projects, f, ensure_ascii=False, indent=2)
+            f.write('[\n')
+            for i, project in enumerate(chain([first], records)):
+                if i:
+                    f.write(',\n')
+                # JSON字符串中的换行已转义，这里的换行都是缩进产生的
+                f.write('  ' + json.dumps(project, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+            f.write('\n]')
         print(f"数据已导出到: {filename}")
 
 
@@ -261,6 +486,8 @@ def main():
   %(prog)s --export csv             # 导出为CSV
   %(prog)s --no-cache               # 不使用缓存
   %(prog)s --all                    # 显示所有项目
+  %(prog)s --save-history           # 保存本次快照到历史记录
+  %(prog)s --export-history csv     # 分块导出全部历史记录
         """
     )
     
@@ -279,23 +506,48 @@ def main():
                        help='显示所有项目')
     parser.add_argument('--quiet', '-q', action='store_true',
                        help='安静模式，只输出数据')
+    parser.add_argument('--save-history', action='store_true',
+                       help='将本次获取的项目追加到历史记录')
+    parser.add_argument('--export-history', type=str, choices=['csv', 'json', 'both'],
+                       help='分块导出历史记录: csv, json, both')
+    parser.add_argument('--memory-limit', type=int, default=256,
+                       help='导出历史记录时的内存上限，单位MB (默认: 256)')
     
     args = parser.parse_args()
     
     # 创建GitHub趋势获取器
-    trending = GitHubTrending()
+    trending = GitHubTrending(memory_limit_mb=args.memory_limit)
+    
+    # 导出历史记录（不需要请求网络）
+    if args.export_history:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        if args.export_history in ['csv', 'both']:
+            trending.export_to_csv(trending.iter_history(), f"github_trending_history_{timestamp}.csv",
+                                   columns=trending.history_columns())
+        
+        if args.export_history in ['json', 'both']:
+            trending.export_to_json(trending.iter_history(), f"github_trending_history_{timestamp}.json")
+        return
     
     # 获取数据
     projects = trending.fetch_trending(
         language=args.language,
         since=args.since,
-        use_cache=not args.no_cache
+        # 保存历史时强制请求，避免把缓存数据记录为新快照
+        use_cache=not (args.no_cache or args.save_history)
     )
     
     if not projects:
         print("错误: 无法获取GitHub趋势数据")
         sys.exit(1)
     
+    if args.save_history:
+        if trending.last_from_cache:
+            print("警告: 请求失败，使用的是缓存数据，未保存到历史记录", file=sys.stderr)
+        else:
+            trending.save_history(projects, language=args.language, since=args.since)
+    
     # 设置显示限制
     limit = None if args.all else args.limit
     
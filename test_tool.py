@@ -5,13 +5,31 @@ GitHub Trending Tool 测试脚本
 
 import sys
 import os
+import glob
 import json
+import tempfile
+import time
 from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pandas as pd
 
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from github_trending import GitHubTrending
+from trending_analytics import TrendingAnalytics
+from trending_replay import CassetteAdapter, StubTrendingServer, render_trending_page, use_cassette
+
+CASSETTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cassettes")
+
+# cassettes/sample_*.json 中各页面第一个项目的期望值
+SAMPLE_EXPECTED = {
+    "sample_daily.json": {'name': 'obra/superpowers', 'stars': 47030, 'stars_today': 1234,
+                          'forks': 3716, 'language': 'Shell'},
+    "sample_python_weekly.json": {'name': 'composiohq/awesome-claude-skills', 'stars': 32056,
+                                  'stars_today': 5402, 'forks': 2481, 'language': 'Python'},
+}
 
 
 def test_basic_functionality():
@@ -127,6 +145,322 @@ def test_basic_functionality():
     return True
 
 
+def test_offline():
+    """使用本地模拟服务器和录制/回放测试（无需网络）"""
+    print("\n\n测试离线模式...")
+    print("="*60)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        trending = GitHubTrending(cache_timeout=300)
+        trending.cache_file = os.path.join(tmpdir, "cache.json")
+        trending.parse_cache_file = os.path.join(tmpdir, "parse_cache.json")
+        
+        with StubTrendingServer(count=25) as server:
+            trending.base_url = server.trending_url
+            
+            # 测试1: 获取和解析
+            print("\n1. 测试模拟服务器获取...")
+            projects = trending.fetch_trending(use_cache=False)
+            if len(projects) != 25 or projects[0]['stars'] != 25 * 1234:
+                print(f"❌ 解析结果不正确: {len(projects)} 个项目")
+                return False
+            print(f"✓ 成功获取 {len(projects)} 个项目")
+            
+            # 测试2: 解析缓存
+            print("\n2. 测试解析缓存...")
+            trending.fetch_trending(use_cache=False)
+            stats = trending.parse_cache_stats()
+            if stats['hits'] != 1 or stats['misses'] != 1:
+                print(f"❌ 解析缓存统计不正确: {stats}")
+                return False
+            server.seed = 1
+            trending.fetch_trending(use_cache=False)
+            if trending.parse_cache_stats()['misses'] != 2:
+                print("❌ 页面内容变化后未重新解析")
+                return False
+            print(f"✓ 解析缓存命中率: {trending.parse_cache_stats()['hit_rate']:.0%}")
+            
+            # 新实例（模拟再次运行）应从文件复用解析结果
+            rerun = GitHubTrending(cache_timeout=300)
+            rerun.cache_file = trending.cache_file
+            rerun.parse_cache_file = trending.parse_cache_file
+            rerun.base_url = server.trending_url
+            modified = os.stat(trending.parse_cache_file).st_mtime_ns
+            rerun.fetch_trending(use_cache=False)
+            if rerun.parse_cache_stats()['hits'] != 1:
+                print("❌ 新实例未复用解析缓存文件")
+                return False
+            if os.stat(trending.parse_cache_file).st_mtime_ns != modified:
+                print("❌ 命中解析缓存时不应重写缓存文件")
+                return False
+            print("✓ 新实例复用解析缓存文件")
+            
+            # 测试3: 文件缓存
+            print("\n3. 测试文件缓存...")
+            request_count = len(server.requests)
+            if not trending.fetch_trending(use_cache=True) or len(server.requests) != request_count:
+                print("❌ 缓存未生效")
+                return False
+            print("✓ 缓存命中，未发送请求")
+            
+            # 测试4: 录制
+            print("\n4. 测试录制...")
+            cassette = os.path.join(tmpdir, "cassettes", "trending.json")
+            with use_cassette(trending, cassette, mode='record') as adapter:
+                recorded = trending.fetch_trending(language="python", use_cache=False)
+            if adapter.record_count != 1 or not os.path.exists(cassette):
+                print("❌ 录制失败")
+                return False
+            with open(cassette, 'r', encoding='utf-8') as f:
+                headers = json.load(f)['interactions'][0]['response']['headers']
+            if set(headers) != {'Content-Type'}:
+                print(f"❌ cassette中录制了多余的响应头: {sorted(headers)}")
+                return False
+            print(f"✓ 已录制到: {os.path.basename(cassette)}")
+        
+        # 测试5: 回放（服务器已关闭）
+        print("\n5. 测试录制后回放...")
+        trending = GitHubTrending(cache_timeout=300)
+        trending.cache_file = os.path.join(tmpdir, "replay_cache.json")
+        trending.parse_cache_file = os.path.join(tmpdir, "replay_parse_cache.json")
+        trending.base_url = server.trending_url
+        with use_cassette(trending, cassette, mode='replay') as adapter:
+            missed = trending.fetch_trending(language="go", use_cache=False)
+            replayed = trending.fetch_trending(language="python", use_cache=False)
+        if adapter.play_count != 1 or [p['name'] for p in replayed] != [p['name'] for p in recorded]:
+            print("❌ 回放结果与录制不一致")
+            return False
+        if missed:
+            print("❌ 未录制的请求不应返回数据")
+            return False
+        print(f"✓ 回放 {len(replayed)} 个项目，与录制一致")
+        
+        # 测试6: 回放 cassettes 目录中的页面
+        print("\n6. 测试回放cassettes...")
+        cassettes = sorted(glob.glob(os.path.join(CASSETTE_DIR, "*.json")))
+        if not cassettes:
+            print("❌ cassettes目录中没有录制文件")
+            return False
+        for cassette_file in cassettes:
+            cassette_name = os.path.basename(cassette_file)
+            for key in list(CassetteAdapter(cassette_file).interactions):
+                url = urlsplit(key.split(' ', 1)[1])
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                
+                player = GitHubTrending(parse_cache_size=0)
+                player.cache_file = os.path.join(tmpdir, "cassette_cache.json")
+                player.base_url = f"{url.scheme}://{url.netloc}{url.path}"
+                with use_cassette(player, cassette_file, mode='replay'):
+                    pages = player.fetch_trending(language=params.get('l', ''),
+                                                  since=params.get('since', ''), use_cache=False)
+                
+                invalid = [p for p in pages if not (
+                    p['name'].count('/') == 1 and p['url'] == f"https://github.com/{p['name']}"
+                    and p['stars'] > 0 and p['stars_today'] > 0 and p['forks'] >= 0 and p['language'])]
+                if not pages or invalid:
+                    print(f"❌ {cassette_name} 解析结果不正确: {invalid or '没有项目'}")
+                    return False
+                
+                expected = SAMPLE_EXPECTED.get(cassette_name)
+                if expected and {k: pages[0][k] for k in expected} != expected:
+                    print(f"❌ {cassette_name} 字段不正确: {pages[0]}")
+                    return False
+                print(f"✓ {cassette_name}: 解析 {len(pages)} 个项目")
+        
+        # 测试7: 错误状态回退到缓存
+        print("\n7. 测试错误回退...")
+        with StubTrendingServer(status=429) as server:
+            trending.base_url = server.trending_url
+            fallback = trending.fetch_trending(use_cache=False)
+        if len(fallback) != len(replayed):
+            print("❌ 请求失败时未使用缓存数据")
+            return False
+        print("✓ 请求失败时使用缓存数据")
+        
+        # 测试8: 延迟、限速和大页面
+        print("\n8. 测试延迟、限速和大页面...")
+        trending.cache_file = os.path.join(tmpdir, "perf_cache.json")
+        latency, throttle = 0.2, 1000000
+        body_size = len(render_trending_page(1000, "c++").encode('utf-8'))
+        min_duration = latency + body_size / throttle
+        with StubTrendingServer(count=1000, latency=latency, throttle=throttle) as server:
+            trending.base_url = server.trending_url
+            start = time.perf_counter()
+            projects = trending.fetch_trending(language="c++", use_cache=False)
+            duration = time.perf_counter() - start
+        if len(projects) != 1000 or projects[0]['language'] != 'C++':
+            print(f"❌ 大页面结果不正确: {len(projects)} 个项目")
+            return False
+        if duration < min_duration:
+            print(f"❌ 限速未生效: 用时 {duration:.2f}秒，至少应为 {min_duration:.2f}秒")
+            return False
+        print(f"✓ 获取并解析 {len(projects)} 个项目，用时 {duration:.2f}秒（下限 {min_duration:.2f}秒）")
+    
+    return True
+
+
+def test_history():
+    """测试历史记录保存和导出（无需网络）"""
+    print("\n\n测试历史记录...")
+    print("="*60)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        trending = GitHubTrending(cache_timeout=300)
+        trending.cache_file = os.path.join(tmpdir, "cache.json")
+        trending.parse_cache_file = os.path.join(tmpdir, "parse_cache.json")
+        trending.history_file = os.path.join(tmpdir, "history.jsonl")
+        
+        # 测试1: 快照时间取自解析时间戳
+        print("\n1. 测试保存快照...")
+        with StubTrendingServer(count=5) as server:
+            trending.base_url = server.trending_url
+            projects = trending.fetch_trending(use_cache=False)
+            trending.save_history(projects, language="python")
+            cached = trending.fetch_trending(use_cache=True)
+        
+        records = list(trending.iter_history())
+        if len(records) != 5 or records[0]['snapshot'] != projects[0]['timestamp']:
+            print("❌ 快照记录不正确")
+            return False
+        if trending.last_from_cache is not True or not cached:
+            print("❌ 未标记缓存数据")
+            return False
+        print("✓ 快照时间为解析时间，缓存数据已标记")
+        
+        # 测试2: 后出现的字段不会被丢弃
+        print("\n2. 测试字段合并...")
+        with open(trending.history_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(dict(records[0], topics="ai")) + '\n')
+        
+        small = GitHubTrending(chunk_size=2)
+        small.history_file = trending.history_file
+        csv_file = os.path.join(tmpdir, "history.csv")
+        small.export_to_csv(small.iter_history(), csv_file, columns=small.history_columns())
+        with open(csv_file, 'r', encoding='utf-8-sig') as f:
+            lines = f.read().splitlines()
+        if 'topics' not in lines[0].split(',') or not lines[-1].endswith(',ai'):
+            print("❌ 新字段被丢弃")
+            return False
+        
+        partial_file = os.path.join(tmpdir, "partial.csv")
+        try:
+            small.export_to_csv(small.iter_history(), partial_file)
+            print("❌ 迭代器输入出现未知字段时应报错")
+            return False
+        except ValueError:
+            pass
+        if os.path.exists(partial_file) or glob.glob(partial_file + ".*"):
+            print("❌ 导出失败时留下了不完整的CSV文件")
+            return False
+        print("✓ 新字段已保留，未知字段不会被静默丢弃")
+    
+    return True
+
+
+def test_analytics():
+    """测试趋势动量分析（无需网络）"""
+    print("\n\n测试趋势分析...")
+    print("="*60)
+    
+    def snapshot(hour):
+        # r7 的星标增长越来越快，其余项目匀速增长
+        return [{
+            'rank': i + 1,
+            'name': f"owner/r{i}",
+            'language': 'Python' if i % 2 else 'Go',
+            'stars': 1000 + hour * (10 + i) + (50 * hour * hour if i == 7 else 0),
+            'stars_today': 0,
+            'forks': 0
+        } for i in range(20)]
+    
+    # 测试1: 增量更新
+    print("\n1. 测试增量更新...")
+    analytics = TrendingAnalytics(window="6h")
+    incremental = []
+    for hour in range(10):
+        metrics = analytics.update(snapshot(hour), snapshot=f"2026-01-01T{hour:02d}:00:00")
+        incremental.append(metrics)
+    
+    first = metrics[metrics['name'] == 'owner/r0'].iloc[0]
+    if first['stars_per_hour'] != 10 or first['rank_velocity'] != 0:
+        print(f"❌ 指标计算不正确: {first.to_dict()}")
+        return False
+    print("✓ 每小时新增星标和排名速度正确")
+    
+    # 测试2: 爆发检测
+    print("\n2. 测试爆发检测...")
+    breakouts = analytics.breakouts()
+    if list(breakouts['name']) != ['owner/r7']:
+        print(f"❌ 爆发项目不正确: {list(breakouts['name'])}")
+        return False
+    print("✓ 检测到爆发项目: owner/r7")
+    
+    # 测试3: 从历史记录分块计算，结果与增量更新一致
+    print("\n3. 测试历史记录分析...")
+    columns = ['stars_per_hour_rolling', 'zscore']
+    
+    def ordered(metrics):
+        return metrics.sort_values(['name', 'snapshot'], ignore_index=True)
+    
+    expected = ordered(pd.concat(incremental, ignore_index=True))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        history_file = os.path.join(tmpdir, "history.jsonl")
+        with open(history_file, 'w', encoding='utf-8') as f:
+            for hour in range(10):
+                for project in snapshot(hour):
+                    record = dict(project, snapshot=f"2026-01-01T{hour:02d}:00:00", language_filter='', since='daily')
+                    f.write(json.dumps(record) + '\n')
+        
+        # chunk_size=7 会把快照拆到不同分块中
+        for chunk_size in (7, 1000):
+            trending = GitHubTrending(chunk_size=chunk_size)
+            trending.history_file = history_file
+            history = TrendingAnalytics(window="6h")
+            chunks = list(history.from_history(trending))
+            if any(chunk['snapshot'].isin(other['snapshot']).any()
+                   for i, chunk in enumerate(chunks) for other in chunks[i + 1:]):
+                print(f"❌ 分块大小 {chunk_size} 的输出把一个快照拆到了多个分块中")
+                return False
+            actual = ordered(pd.concat(chunks, ignore_index=True))
+            
+            if (len(actual) != len(expected)
+                    or not np.allclose(actual[columns], expected[columns], equal_nan=True)
+                    or not actual['breakout'].equals(expected['breakout'])):
+                print(f"❌ 分块大小 {chunk_size} 的计算结果与增量更新不一致")
+                return False
+            if list(history.breakouts()['name']) != ['owner/r7']:
+                print(f"❌ 分块大小 {chunk_size} 的爆发项目不正确")
+                return False
+    print("✓ 不同分块大小的Z分数、爆发标记与增量更新一致")
+    
+    # 测试4: 小语言分组中的爆发项目
+    print("\n4. 测试小语言分组的爆发检测...")
+    languages = ["Python", "JavaScript", "Go", "Rust", "TypeScript", "Java", "C++", "Shell"]
+    
+    def mixed_snapshot(hour):
+        # 25个项目分布在8种语言中，r15(Go) 和 r23(Shell) 的增长远超其他项目
+        return [{
+            'rank': i + 1,
+            'name': f"owner/r{i}",
+            'language': languages[i % len(languages)],
+            'stars': 1000 + hour * (30 + i) + (3200 * hour if i in (15, 23) else 0),
+            'stars_today': 0,
+            'forks': 0
+        } for i in range(25)]
+    
+    mixed = TrendingAnalytics(window="6h")
+    for hour in range(12):
+        mixed.update(mixed_snapshot(hour), snapshot=f"2026-01-01T{hour:02d}:00:00")
+    
+    found = set(mixed.breakouts()['name'])
+    if found != {'owner/r15', 'owner/r23'}:
+        print(f"❌ 爆发项目不正确: {sorted(found)}")
+        return False
+    print("✓ 检测到小语言分组中的爆发项目: owner/r15 (Go), owner/r23 (Shell)")
+    
+    return True
+
+
 def test_command_line():
     """测试命令行接口"""
     print("\n\n测试命令行接口...")
@@ -193,15 +527,27 @@ def main():
     # 运行测试
     all_passed = True
     
-    # 测试基本功能
-    if not test_basic_functionality():
+    # 离线测试
+    if not test_offline():
+        all_passed = False
+    
+    if not test_history():
         all_passed = False
     
-    # 测试命令行接口（可选，因为需要网络）
-    run_cli_tests = input("\n是否运行命令行接口测试？(需要网络连接) (y/n): ").lower().strip()
-    if run_cli_tests == 'y':
-        if not test_command_line():
+    if not test_analytics():
+        all_passed = False
+    
+    # 使用 --offline 时跳过需要网络的测试（适合CI）
+    if '--offline' not in sys.argv[1:]:
+        # 测试基本功能
+        if not test_basic_functionality():
             all_passed = False
+        
+        # 测试命令行接口（可选，因为需要网络）
+        run_cli_tests = input("\n是否运行命令行接口测试？(需要网络连接) (y/n): ").lower().strip()
+        if run_cli_tests == 'y':
+            if not test_command_line():
+                all_passed = False
     
     # 记录结束时间
     end_time = datetime.now()
@@ -221,7 +567,8 @@ def main():
     print(f"完成时间: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
     
     # 清理临时文件
-    cleanup_files = [".github_trending_cache.json", "test_output.csv", "test_output.json"]
+    cleanup_files = [".github_trending_cache.json", ".github_trending_parse_cache.json",
+                     "test_output.csv", "test_output.json"]
     for file in cleanup_files:
         if os.path.exists(file):
             try:
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+GitHub Trending 趋势分析
+基于历史快照计算每小时新增星标、排名变化速度/加速度及爆发项目，
+每次获取新快照时增量更新，无需从头重新计算
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Union
+import numpy as np
+import pandas as pd
+
+from github_trending import GitHubTrending
+
+# 同一项目在同一页面（语言过滤 + 时间范围）中的快照序列
+KEY_COLUMNS = ['name', 'language_filter', 'since']
+STATE_COLUMNS = KEY_COLUMNS + ['snapshot', 'stars', 'rank', 'rank_velocity']
+# 同一次获取的页面，爆发检测在该范围内比较
+PAGE_COLUMNS = ['snapshot', 'language_filter', 'since']
+# update 在输入记录之外追加的指标字段
+METRIC_COLUMNS = ['rank_velocity', 'hours', 'stars_gained', 'stars_per_hour', 'rank_acceleration',
+                  'stars_per_hour_rolling', 'zscore', 'breakout']
+
+
+class TrendingAnalytics:
+    """趋势动量分析器"""
+
+    def __init__(self, window: str = "24h", breakout_zscore: float = 2.0, min_stars_per_hour: float = 10.0):
+        """
+        初始化趋势分析器
+
+        Args:
+            window: 滚动窗口长度（pandas时间间隔，如 6h、24h、7d）
+            breakout_zscore: 判定爆发的Z分数阈值（同一快照、同一页面内跨语言比较）
+            min_stars_per_hour: 判定爆发的最小每小时新增星标数
+        """
+        self.window = pd.Timedelta(window)
+        self.window_label = window
+        self.breakout_zscore = breakout_zscore
+        self.min_stars_per_hour = min_stars_per_hour
+        # 每个项目最近一次快照的状态，用于与新快照做差分
+        self._last = pd.DataFrame(columns=STATE_COLUMNS)
+        # 滚动窗口内的指标行，超出窗口的行会被丢弃
+        self._window = pd.DataFrame()
+
+    def _normalize(self, records: Union[pd.DataFrame, Iterable[Dict[str, Any]]], language: str,
+                   since: str, snapshot: Optional[str]) -> pd.DataFrame:
+        """整理输入记录，补齐快照时间和页面字段"""
+        df = records.copy() if isinstance(records, pd.DataFrame) else pd.DataFrame.from_records(list(records))
+        if df.empty:
+            return df
+
+        if 'snapshot' not in df.columns:
+            df['snapshot'] = snapshot or datetime.now().isoformat()
+        if 'language_filter' not in df.columns:
+            df['language_filter'] = language
+        if 'since' not in df.columns:
+            df['since'] = since
+
+        for column in ['language', 'language_filter', 'since']:
+            if column in df.columns:
+                df[column] = df[column].astype(object).fillna('')
+        df['snapshot'] = pd.to_datetime(df['snapshot'])
+        df['stars'] = df['stars'].astype('float64')
+        df['rank'] = df['rank'].astype('float64')
+        return df
+
+    def update(self, records: Union[pd.DataFrame, Iterable[Dict[str, Any]]], language: str = "",
+               since: str = "daily", snapshot: Optional[str] = None) -> pd.DataFrame:
+        """
+        加入新的快照记录并计算其指标
+
+        Args:
+            records: 项目列表（fetch_trending 的返回值）或历史记录DataFrame，可包含多个快照
+            language: 记录中缺少 language_filter 字段时使用的语言过滤
+            since: 记录中缺少 since 字段时使用的时间范围
+            snapshot: 记录中缺少 snapshot 字段时使用的快照时间，默认为当前时间
+
+        Returns:
+            新记录的指标DataFrame
+        """
+        new = self._normalize(records, language, since, snapshot)
+        if new.empty:
+            return pd.DataFrame()
+        new['_new'] = True
+        new['rank_velocity'] = np.nan
+
+        # 只取新记录中出现的项目的上一次状态，排序和分组不涉及其他历史项目
+        matched = np.zeros(len(self._last), dtype=bool)
+        if not self._last.empty:
+            keys = pd.MultiIndex.from_frame(new[KEY_COLUMNS])
+            matched = pd.MultiIndex.from_frame(self._last[KEY_COLUMNS]).isin(keys)
+        previous = self._last[matched].assign(_new=False)
+        combined = pd.concat([previous, new], ignore_index=True) if not previous.empty else new
+        combined = combined.sort_values(KEY_COLUMNS + ['snapshot'], kind='mergesort', ignore_index=True)
+        groups = combined.groupby(KEY_COLUMNS, sort=False)
+
+        hours = groups['snapshot'].diff().dt.total_seconds() / 3600
+        hours = hours.where(hours > 0)
+        combined['hours'] = hours
+        combined['stars_gained'] = groups['stars'].diff()
+        combined['stars_per_hour'] = combined['stars_gained'] / hours
+        # 排名数字变小表示上升，速度取正值表示上升（加0.0避免出现-0.0）
+        velocity = -groups['rank'].diff() / hours + 0.0
+        combined['rank_velocity'] = velocity.where(combined['_new'].astype(bool), combined['rank_velocity'])
+        combined['rank_acceleration'] = groups['rank_velocity'].diff() / hours
+
+        latest = combined.groupby(KEY_COLUMNS, sort=False).tail(1)[STATE_COLUMNS]
+        unchanged = self._last[~matched]
+        self._last = (pd.concat([unchanged, latest], ignore_index=True) if not unchanged.empty
+                      else latest.reset_index(drop=True))
+
+        metrics = combined[combined['_new'].astype(bool)].drop(columns=['_new']).reset_index(drop=True)
+        return self._apply_window(metrics)
+
+    def _apply_window(self, metrics: pd.DataFrame) -> pd.DataFrame:
+        """
+        更新滚动窗口，计算窗口内的平均每小时新增星标数和爆发标记
+
+        Z分数按窗口中完整的快照计算，同一快照分多次 update 加入时，
+        后加入的记录会与之前的记录一起比较。
+        """
+        # 先保留新记录中最早快照所需的历史，计算完成后再按最新快照裁剪窗口
+        start = metrics['snapshot'].min() - self.window
+        previous = self._window[self._window['snapshot'] > start] if not self._window.empty else self._window
+        window = pd.concat([previous, metrics], ignore_index=True) if not previous.empty else metrics
+        window = window.sort_values(KEY_COLUMNS + ['snapshot'], kind='mergesort', ignore_index=True)
+
+        rolling = (window.set_index('snapshot')
+                   .groupby(KEY_COLUMNS, sort=False)['stars_per_hour']
+                   .rolling(self.window, min_periods=1)
+                   .mean()
+                   .rename('stars_per_hour_rolling')
+                   .reset_index())
+        window = window.drop(columns=['stars_per_hour_rolling'], errors='ignore')
+        window = window.merge(rolling.drop_duplicates(KEY_COLUMNS + ['snapshot'], keep='last'),
+                              on=KEY_COLUMNS + ['snapshot'], how='left')
+        self._window = window[window['snapshot'] > window['snapshot'].max() - self.window].reset_index(drop=True)
+
+        snapshots = window[window['snapshot'].isin(metrics['snapshot'].unique())]
+        scored = self._detect_breakouts(snapshots)
+        return metrics.drop(columns=['stars_per_hour_rolling'], errors='ignore').merge(
+            scored[KEY_COLUMNS + ['snapshot', 'stars_per_hour_rolling', 'zscore', 'breakout']],
+            on=KEY_COLUMNS + ['snapshot'], how='left')
+
+    def _detect_breakouts(self, metrics: pd.DataFrame) -> pd.DataFrame:
+        """
+        按快照页面分组计算Z分数，标记爆发项目（分组应包含完整的快照）
+
+        在同一页面的所有项目之间比较，而不是按语言分组：一页只有二十几个项目，
+        按语言拆分后多数分组只有几个项目，单个离群值的Z分数上限 (n-1)/√n 达不到阈值。
+        """
+        metrics = metrics.copy()
+        groups = metrics.groupby(PAGE_COLUMNS, sort=False)['stars_per_hour_rolling']
+        mean = groups.transform('mean')
+        std = groups.transform('std').replace(0, np.nan)
+        metrics['zscore'] = (metrics['stars_per_hour_rolling'] - mean) / std
+        metrics['breakout'] = ((metrics['zscore'] >= self.breakout_zscore)
+                               & (metrics['stars_per_hour'] >= self.min_stars_per_hour))
+        return metrics
+
+    def from_history(self, trending: GitHubTrending) -> Iterator[pd.DataFrame]:
+        """
+        按块读取历史记录并逐块增量计算，逐块返回指标
+
+        分块大小由内存决定，可能把一个快照拆到两个分块中。每块中最新的快照
+        先暂存，与下一块合并后再计算Z分数，因此返回的每个分块都只包含完整的快照
+        （历史记录按快照时间顺序追加）。
+        """
+        pending = pd.DataFrame()
+        for df in trending.iter_frames(trending.iter_history()):
+            metrics = self.update(df)
+            if metrics.empty:
+                continue
+            if not pending.empty:
+                metrics = pd.concat([pending, metrics], ignore_index=True)
+
+            is_last = metrics['snapshot'] == metrics['snapshot'].max()
+            pending = metrics[is_last]
+            if not is_last.all():
+                yield self._detect_breakouts(metrics[~is_last].reset_index(drop=True))
+
+        if not pending.empty:
+            yield self._detect_breakouts(pending.reset_index(drop=True))
+
+    def current(self) -> pd.DataFrame:
+        """滚动窗口内每个项目最新快照的指标"""
+        if self._window.empty:
+            return pd.DataFrame()
+        scored = self._detect_breakouts(self._window)
+        return scored.groupby(KEY_COLUMNS, sort=False).tail(1).reset_index(drop=True)
+
+    def breakouts(self, limit: Optional[int] = None) -> pd.DataFrame:
+        """当前窗口内的爆发项目，按每小时新增星标数降序"""
+        current = self.current()
+        if current.empty:
+            return current
+        result = current[current['breakout']].sort_values('stars_per_hour_rolling', ascending=False)
+        return result.head(limit) if limit else result
+
+    def print_report(self, limit: int = 10) -> None:
+        """打印动量排行和爆发项目"""
+        current = self.current()
+        if not current.empty:
+            current = current.dropna(subset=['stars_per_hour_rolling'])
+        if current.empty:
+            print("历史快照不足，至少需要同一项目的两次快照")
+            return
+
+        print(f"趋势动量 (窗口: {self.window_label})")
+        print(f"{'='*20}")
+
+        top = current.sort_values('stars_per_hour_rolling', ascending=False).head(limit)
+        for i, row in enumerate(top.itertuples(), 1):
+            acceleration = '' if pd.isna(row.rank_acceleration) else f" | 排名加速度: {row.rank_acceleration:+.2f}/h²"
+            print(f"\n{i:2d}. {row.name}{' 🚀' if row.breakout else ''}")
+            print(f"    🔤 语言: {row.language}")
+            print(f"    ⭐ 每小时新增: {row.stars_per_hour_rolling:,.1f} (窗口平均)")
+            print(f"    📈 排名: {int(row.rank)} | 排名速度: {row.rank_velocity:+.2f}/h{acceleration}")
+
+        breakouts = self.breakouts(limit)
+        print(f"\n{'='*20}")
+        print(f"🚀 爆发项目: {', '.join(breakouts['name']) if not breakouts.empty else '无'}")
+
+
+def history_metric_columns(trending: GitHubTrending) -> List[str]:
+    """from_history 输出的全部字段：历史记录字段加上指标字段"""
+    columns = trending.history_columns()
+    return columns + [column for column in METRIC_COLUMNS if column not in columns]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='分析GitHub趋势历史记录的动量')
+    parser.add_argument('--window', '-w', type=str, default='24h',
+                       help='滚动窗口长度 (默认: 24h)')
+    parser.add_argument('--limit', '-n', type=int, default=10,
+                       help='显示项目数量 (默认: 10)')
+    parser.add_argument('--zscore', type=float, default=2.0,
+                       help='判定爆发的Z分数阈值 (默认: 2.0)')
+    parser.add_argument('--export', '-e', type=str,
+                       help='导出全部指标到CSV文件')
+    args = parser.parse_args()
+
+    trending = GitHubTrending()
+    analytics = TrendingAnalytics(window=args.window, breakout_zscore=args.zscore)
+    chunks = analytics.from_history(trending)
+
+    if args.export:
+        # 逐块导出，不在内存中保留全部指标
+        columns = history_metric_columns(trending)
+        records = chain.from_iterable(df.to_dict('records') for df in chunks)
+        trending.export_to_csv(records, args.export, columns=columns)
+    else:
+        for _ in chunks:
+            pass
+
+    if analytics.current().empty:
+        print("没有历史记录，请先使用 github_trending.py --save-history 保存快照")
+        sys.exit(1)
+
+    analytics.print_report(limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
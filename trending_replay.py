@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+GitHub Trending 录制/回放工具
+为 GitHubTrending.session 提供录制/回放（cassette）以及本地模拟服务器，
+用于离线、可复现地测试获取、解析和缓存流程及其性能
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Any
+from urllib.parse import parse_qs
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from github_trending import GitHubTrending
+
+
+class CassetteMissError(requests.ConnectionError):
+    """回放模式下找不到匹配的录制记录"""
+
+
+class CassetteAdapter(HTTPAdapter):
+    """按请求方法和URL录制/回放HTTP响应的适配器"""
+
+    MODES = ('record', 'replay', 'auto')
+    # 只录制回放需要的响应头，Set-Cookie、Date、X-GitHub-Request-Id 等不会写入cassette
+    RECORDED_HEADERS = ('Content-Type',)
+
+    def __init__(self, cassette_file: str, mode: str = 'auto'):
+        """
+        初始化录制/回放适配器
+
+        Args:
+            cassette_file: cassette文件路径（JSON）
+            mode: record(总是请求并录制), replay(只回放), auto(有记录则回放，否则录制)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"不支持的模式: {mode}")
+        super().__init__()
+        self.cassette_file = cassette_file
+        self.mode = mode
+        self.interactions: Dict[str, Dict[str, Any]] = {}
+        # interactions 以外的顶层字段（如 note），保存时原样写回
+        self.metadata: Dict[str, Any] = {}
+        self.play_count = 0
+        self.record_count = 0
+        self._load()
+
+    def _load(self) -> None:
+        """加载已有的录制记录"""
+        try:
+            with open(self.cassette_file, 'r', encoding='utf-8') as f:
+                cassette = json.load(f)
+            self.metadata = {k: v for k, v in cassette.items() if k != 'interactions'}
+            for interaction in cassette.get('interactions', []):
+                request = interaction['request']
+                self.interactions[self._key(request['method'], request['url'])] = interaction['response']
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def save(self) -> None:
+        """保存录制记录到cassette文件"""
+        interactions = []
+        for key, response in self.interactions.items():
+            method, url = key.split(' ', 1)
+            interactions.append({'request': {'method': method, 'url': url}, 'response': response})
+
+        directory = os.path.dirname(self.cassette_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cassette_file, 'w', encoding='utf-8') as f:
+            json.dump(dict(self.metadata, interactions=interactions), f, ensure_ascii=False, indent=2)
+
+    def _key(self, method: str, url: str) -> str:
+        """生成录制记录的键"""
+        return f"{method.upper()} {url}"
+
+    def send(self, request, **kwargs):
+        key = self._key(request.method, request.url)
+
+        if self.mode != 'record' and key in self.interactions:
+            self.play_count += 1
+            return self._build_response(request, self.interactions[key])
+
+        if self.mode == 'replay':
+            raise CassetteMissError(f"cassette中没有匹配的请求: {key}", request=request)
+
+        response = super().send(request, **kwargs)
+        self.record_count += 1
+        self.interactions[key] = {
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {name: response.headers[name] for name in self.RECORDED_HEADERS
+                        if name in response.headers},
+            'encoding': response.encoding,
+            'body': response.content.decode(response.encoding or 'utf-8', errors='replace')
+        }
+        return response
+
+    def _build_response(self, request, recorded: Dict[str, Any]) -> requests.Response:
+        """根据录制记录构造响应对象"""
+        encoding = recorded.get('encoding') or 'utf-8'
+        response = requests.Response()
+        response.status_code = recorded['status']
+        response.reason = recorded.get('reason', '')
+        response.headers = CaseInsensitiveDict(recorded.get('headers', {}))
+        # 内容已解压存储，去掉相关头部避免重复解码
+        response.headers.pop('Content-Encoding', None)
+        response.headers.pop('Content-Length', None)
+        response.encoding = encoding
+        response._content = recorded.get('body', '').encode(encoding)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+@contextmanager
+def use_cassette(trending: GitHubTrending, cassette_file: str, mode: str = 'auto') -> Iterator[CassetteAdapter]:
+    """在上下文中为 trending.session 挂载录制/回放适配器，退出时保存记录"""
+    adapter = CassetteAdapter(cassette_file, mode=mode)
+    original = dict(trending.session.adapters)
+    trending.session.mount('https://', adapter)
+    trending.session.mount('http://', adapter)
+    try:
+        yield adapter
+    finally:
+        trending.session.adapters.clear()
+        for prefix, original_adapter in original.items():
+            trending.session.mount(prefix, original_adapter)
+        if adapter.record_count:
+            adapter.save()
+
+
+def render_trending_page(count: int = 25, language: str = "", since: str = "daily", seed: int = 0) -> str:
+    """生成与GitHub趋势页面结构一致的模拟HTML"""
+    languages = ["Python", "JavaScript", "Go", "Rust", "TypeScript", "Java", "C++", "Shell"]
+    articles = []
+
+    for i in range(count):
+        n = seed * 100000 + i
+        name = f"owner{n}/repo{n}"
+        lang = language.capitalize() if language else languages[n % len(languages)]
+        articles.append(f"""
+    <article class="Box-row">
+      <h2 class="h3 lh-condensed">
+        <a href="/{name}">{name}</a>
+      </h2>
+      <p class="col-9 color-fg-muted my-1 pr-4">Synthetic trending project {n} ({since})</p>
+      <div class="f6 color-fg-muted mt-2">
+        <span itemprop="programmingLanguage">{lang}</span>
+        <a href="/{name}/stargazers">{(count - i) * 1234:,}</a>
+        <a href="/{name}/forks">{(count - i) * 56:,}</a>
+        <span class="d-inline-block float-sm-right">{(count - i) * 10:,} stars today</span>
+      </div>
+    </article>""")
+
+    return f"""<!DOCTYPE html>
+<html>
+<head><title>Trending repositories on GitHub today</title></head>
+<body>
+  <div class="Box">{''.join(articles)}
+  </div>
+</body>
+</html>
+"""
+
+
+class StubTrendingServer:
+    """本地模拟GitHub趋势页面的HTTP服务器，可注入延迟、限速、错误和大页面"""
+
+    def __init__(self, count: int = 25, latency: float = 0.0, throttle: int = 0,
+                 status: int = 200, seed: int = 0, port: int = 0):
+        """
+        初始化模拟服务器
+
+        Args:
+            count: 每页项目数量，较大的值可以模拟大页面
+            latency: 每个请求的响应延迟（秒）
+            throttle: 响应限速（字节/秒），0表示不限速
+            status: 响应状态码，可用于模拟429/500等错误
+            seed: 页面内容种子，修改后页面内容随之变化
+            port: 监听端口，0表示自动分配
+        """
+        self.count = count
+        self.latency = latency
+        self.throttle = throttle
+        self.status = status
+        self.seed = seed
+        self.requests: List[str] = []
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """服务器根地址"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def trending_url(self) -> str:
+        """趋势页面地址，可直接赋值给 GitHubTrending.base_url"""
+        return f"{self.url}/trending"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.path)
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                path, _, query = self.path.partition('?')
+                if path.rstrip('/') != '/trending':
+                    self.send_error(404)
+                    return
+                if stub.status != 200:
+                    self.send_error(stub.status)
+                    return
+
+                params = {key: values[0] for key, values in parse_qs(query).items()}
+                body = render_trending_page(stub.count, params.get('l', ''),
+                                            params.get('since', 'daily'), stub.seed).encode('utf-8')
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+
+                if not stub.throttle:
+                    self.wfile.write(body)
+                    return
+
+                # 按限速分片发送
+                step = max(1, stub.throttle // 10)
+                for start in range(0, len(body), step):
+                    self.wfile.write(body[start:start + step])
+                    time.sleep(step / stub.throttle)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubTrendingServer":
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """停止服务器"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "StubTrendingServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='录制GitHub趋势页面或启动本地模拟服务器',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  %(prog)s record cassettes/trending.json                    # 录制今日热门页面
+  %(prog)s record cassettes/python.json --language python    # 录制Python页面
+  %(prog)s serve --port 8000 --count 500 --latency 0.5       # 启动模拟服务器
+        """
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='请求github.com并录制到cassette')
+    record_parser.add_argument('cassette', type=str, help='cassette文件路径')
+    record_parser.add_argument('--language', '-l', type=str, default='', help='编程语言过滤')
+    record_parser.add_argument('--since', '-s', type=str, default='daily',
+                               choices=['daily', 'weekly', 'monthly'], help='时间范围')
+
+    serve_parser = subparsers.add_parser('serve', help='启动本地模拟服务器')
+    serve_parser.add_argument('--port', type=int, default=8000, help='监听端口 (默认: 8000)')
+    serve_parser.add_argument('--count', type=int, default=25, help='每页项目数量 (默认: 25)')
+    serve_parser.add_argument('--latency', type=float, default=0.0, help='响应延迟（秒）')
+    serve_parser.add_argument('--throttle', type=int, default=0, help='响应限速（字节/秒）')
+    serve_parser.add_argument('--status', type=int, default=200, help='响应状态码')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        trending = GitHubTrending()
+        with use_cassette(trending, args.cassette, mode='record') as adapter:
+            projects = trending.fetch_trending(language=args.language, since=args.since, use_cache=False)
+        if not projects:
+            print("错误: 录制失败，未获取到项目")
+            sys.exit(1)
+        print(f"已录制 {adapter.record_count} 个请求（{len(projects)} 个项目）到: {args.cassette}")
+        return
+
+    server = StubTrendingServer(count=args.count, latency=args.latency, throttle=args.throttle,
+                                status=args.status, port=args.port)
+    print(f"模拟服务器已启动: {server.trending_url}")
+    try:
+        server.start()
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()